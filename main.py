@@ -1,72 +1,125 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, Form
+from fastapi import FastAPI, HTTPException, WebSocket, Depends, Form
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
+from dataclasses import dataclass, field
+import array
 import asyncio
-import secrets
+import base64
+import os
 import hashlib
+import string
 import time
-import json
 import uuid
+
+import orjson
 from datetime import datetime, timedelta
+from enum import IntEnum
 import logging
 
+from config import settings
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Система анонимного голосования")
+# orjson сериализует ответы в разы быстрее стандартного json
+app = FastAPI(title="Система анонимного голосования", default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Варианты голоса: внутри храним компактные индексы вместо строк
+class Choice(IntEnum):
+    FOR = 0
+    AGAINST = 1
+    ABSTAIN = 2
+
+_CHOICE_NAMES = ("за", "против", "воздержался")
+_CHOICE_MAP = {name: Choice(idx) for idx, name in enumerate(_CHOICE_NAMES)}
+
+def _new_vote_counts() -> array.array:
+    return array.array("i", (0, 0, 0))
+
+def _counts_to_dict(counts) -> Dict[str, int]:
+    return dict(zip(_CHOICE_NAMES, counts))
+
+# Сколько секунд отдавать закешированный ответ /status между изменениями
+_STATUS_CACHE_TTL = 0.5
+
+# Все данные одной сессии лежат в одном слотовом объекте: один поиск по
+# session_id вместо шести параллельных словарей
+@dataclass(slots=True)
+class SessionState:
+    id: str
+    title: str
+    description: str
+    created_at: float
+    status: str = "created"
+    members: List[dict] = field(default_factory=list)
+    member_count: int = 0
+    tokens: Set[str] = field(default_factory=set)
+    unused_tokens: int = 0
+    # Журнал голосов в виде параллельных массивов: компактнее и локальнее
+    # в памяти, чем список словарей (session_id и так известен из ключа)
+    vote_choices: array.array = field(default_factory=lambda: array.array("B"))
+    vote_timestamps: array.array = field(default_factory=lambda: array.array("d"))
+    vote_token_hashes: List[bytes] = field(default_factory=list)
+    vote_counts: array.array = field(default_factory=_new_vote_counts)
+    voting: Optional[dict] = None  # voting_info активного/завершенного голосования
+    status_cache: Optional[tuple] = None  # (timestamp, ответ /status) для частых опросов
+
 # В памяти хранилища (для демонстрации, в продакшене используйте Redis/PostgreSQL)
 class InMemoryStorage:
     def __init__(self):
-        self.sessions: Dict[str, dict] = {}
+        self.sessions: Dict[str, SessionState] = {}
         self.tokens: Dict[str, dict] = {}
-        self.votes: Dict[str, list] = {}  # session_id -> [votes]
-        self.members: Dict[str, list] = {}  # session_id -> [members]
-        self.active_voting: Dict[str, dict] = {}  # session_id -> voting_info
-        
+        self.used_tokens: Set[str] = set()  # токены, по которым уже проголосовали
+
 storage = InMemoryStorage()
 
 # WebSocket connections
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {
-            "admin": [],
-            "projector": []
+        self.active_connections: Dict[str, Set[WebSocket]] = {
+            "admin": set(),
+            "projector": set()
         }
 
     async def connect(self, websocket: WebSocket, connection_type: str):
         await websocket.accept()
-        self.active_connections[connection_type].append(websocket)
+        self.active_connections[connection_type].add(websocket)
 
     def disconnect(self, websocket: WebSocket, connection_type: str):
-        if websocket in self.active_connections[connection_type]:
-            self.active_connections[connection_type].remove(websocket)
+        self.active_connections[connection_type].discard(websocket)
 
     async def broadcast_to_type(self, message: dict, connection_type: str):
-        disconnected = []
-        for connection in self.active_connections[connection_type]:
-            try:
-                await connection.send_text(json.dumps(message))
-            except:
-                disconnected.append(connection)
-        
+        connections = list(self.active_connections[connection_type])
+        if not connections:
+            return
+
+        # Сериализуем сообщение один раз, а не для каждого соединения
+        # (send_text ждет str, поэтому декодируем; клиенты читают текстовые фреймы)
+        payload = orjson.dumps(message).decode()
+
+        # Рассылаем всем параллельно: медленный клиент не задерживает остальных
+        results = await asyncio.gather(
+            *(connection.send_text(payload) for connection in connections),
+            return_exceptions=True
+        )
+
         # Удаляем отключенные соединения
-        for conn in disconnected:
-            if conn in self.active_connections[connection_type]:
-                self.active_connections[connection_type].remove(conn)
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                self.active_connections[connection_type].discard(connection)
 
 manager = ConnectionManager()
 
@@ -90,71 +143,76 @@ class Vote(BaseModel):
     choice: str  # "за", "против", "воздержался"
 
 # Утилиты
-def generate_token() -> str:
-    return secrets.token_urlsafe(32)
+def generate_tokens(count: int) -> List[str]:
+    # Одно обращение к системному ГСЧ вместо count вызовов secrets.token_urlsafe;
+    # нарезка и base64 дают тот же формат токена
+    n = settings.TOKEN_LENGTH
+    raw = os.urandom(n * count)
+    return [
+        base64.urlsafe_b64encode(raw[i * n:(i + 1) * n]).rstrip(b"=").decode("ascii")
+        for i in range(count)
+    ]
 
 def generate_session_id() -> str:
     return str(uuid.uuid4())
 
-def hash_token(token: str) -> str:
-    return hashlib.sha256(token.encode()).hexdigest()
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts).isoformat()
+
+def hash_token(token: str) -> bytes:
+    # BLAKE2s быстрее SHA-256, а для дедупликации и так высокоэнтропийных
+    # токенов 128-битного дайджеста достаточно; отдаем сырые байты без hex
+    return hashlib.blake2s(token.encode("ascii"), digest_size=16).digest()
 
 # API endpoints
 @app.post("/api/admin/create-session")
 async def create_session(session: Session):
     session_id = generate_session_id()
-    
-    # Создаем сессию
-    storage.sessions[session_id] = {
-        "id": session_id,
-        "title": session.title,
-        "description": session.description,
-        "created_at": datetime.now().isoformat(),
-        "status": "created"
-    }
-    
-    # Сохраняем участников
-    storage.members[session_id] = []
-    for member in session.members:
-        storage.members[session_id].append({
-            "name": member.name,
-            "contact": member.contact
-        })
-    
-    # Инициализируем голоса
-    storage.votes[session_id] = []
-    
+
+    # Создаем сессию вместе с участниками и счетчиками
+    storage.sessions[session_id] = SessionState(
+        id=session_id,
+        title=session.title,
+        description=session.description,
+        created_at=time.time(),  # форматируется в ISO только при выдаче клиенту
+        members=[{"name": member.name, "contact": member.contact} for member in session.members],
+        member_count=len(session.members)
+    )
+
     logger.info(f"Создана сессия {session_id} с {len(session.members)} участниками")
     
     return {"session_id": session_id, "status": "success"}
 
 @app.post("/api/admin/start-voting/{session_id}")
 async def start_voting(session_id: str, voting: VotingSession):
-    if session_id not in storage.sessions:
+    state = storage.sessions.get(session_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Сессия не найдена")
-    
-    # Генерируем токены для участников
+
+    # Генерируем токены для участников одной пачкой
     tokens = []
-    for member in storage.members[session_id]:
-        token = generate_token()
+    state.tokens = set()
+    for member, token in zip(state.members, generate_tokens(state.member_count)):
         storage.tokens[token] = {
             "session_id": session_id,
             "member_name": member["name"],
-            "used": False,
-            "expires_at": time.time() + (voting.duration_minutes * 60) + 300,  # +5 мин буфер
+            "expires_at": time.time() + (voting.duration_minutes * 60) + settings.TOKEN_EXPIRE_BUFFER_MINUTES * 60,
             "created_at": time.time()
         }
-        
+        state.tokens.add(token)
+
         tokens.append({
             "member": member["name"],
             "contact": member["contact"],
             "token": token,
             "voting_url": f"/vote?token={token}"
         })
-    
+
+    state.unused_tokens = len(tokens)
+
     # Устанавливаем активное голосование
     end_time = time.time() + (voting.duration_minutes * 60)
-    storage.active_voting[session_id] = {
+    state.voting = {
         "presenter_name": voting.presenter_name,
         "topic_title": voting.topic_title,
         "topic_description": voting.topic_description,
@@ -163,9 +221,10 @@ async def start_voting(session_id: str, voting: VotingSession):
         "duration_minutes": voting.duration_minutes,
         "status": "active"
     }
-    
+
     # Обновляем статус сессии
-    storage.sessions[session_id]["status"] = "voting"
+    state.status = "voting"
+    state.status_cache = None
     
     # Уведомляем проектор
     await manager.broadcast_to_type({
@@ -196,36 +255,53 @@ async def start_voting(session_id: str, voting: VotingSession):
         "voting_ends_at": end_time
     }
 
+async def evict_session_tokens(session_id: str, tokens: frozenset, delay_seconds: float):
+    """Удаляет токены завершенного голосования, чтобы storage.tokens не рос бесконечно
+
+    Работает со снимком токенов, сделанным при завершении голосования: если за
+    буферное время голосование перезапустили, токены нового раунда не трогаем.
+    """
+    await asyncio.sleep(delay_seconds)
+
+    evicted = 0
+    for token in tokens:
+        if storage.tokens.pop(token, None) is not None:
+            evicted += 1
+        storage.used_tokens.discard(token)
+
+    # Состояние сессии чистим только если в нем все еще токены нашего раунда
+    state = storage.sessions.get(session_id)
+    if state is not None and state.tokens <= tokens:
+        state.tokens.clear()
+        state.unused_tokens = 0
+
+    if evicted:
+        logger.info(f"Удалено {evicted} токенов завершенной сессии {session_id}")
+
 async def auto_end_voting(session_id: str, duration_seconds: int):
     await asyncio.sleep(duration_seconds)
     
-    if session_id in storage.active_voting and storage.active_voting[session_id]["status"] == "active":
+    state = storage.sessions.get(session_id)
+    if state is not None and state.voting and state.voting["status"] == "active":
         await end_voting(session_id)
 
 @app.post("/api/admin/end-voting/{session_id}")
 async def end_voting(session_id: str):
-    if session_id not in storage.active_voting:
+    state = storage.sessions.get(session_id)
+    if state is None or state.voting is None:
         raise HTTPException(status_code=404, detail="Активное голосование не найдено")
-    
-    # Подсчитываем голоса
-    votes_count = {"за": 0, "против": 0, "воздержался": 0}
-    
-    # Подсчитываем уже поданные голоса
-    for vote in storage.votes.get(session_id, []):
-        votes_count[vote["choice"]] += 1
-    
-    # Считаем неиспользованные токены как "воздержался"
-    unused_tokens = 0
-    for token, token_data in storage.tokens.items():
-        if token_data["session_id"] == session_id and not token_data["used"]:
-            unused_tokens += 1
-    
-    votes_count["воздержался"] += unused_tokens
-    
+
+    # Берем накопленные счетчики голосов (копию, чтобы не портить живой счетчик)
+    votes_count = _counts_to_dict(state.vote_counts)
+
+    # Считаем неиспользованные токены как "воздержался" (счетчик ведется на лету)
+    votes_count["воздержался"] += state.unused_tokens
+
     # Обновляем статус голосования
-    storage.active_voting[session_id]["status"] = "completed"
-    storage.active_voting[session_id]["results"] = votes_count
-    storage.sessions[session_id]["status"] = "completed"
+    state.voting["status"] = "completed"
+    state.voting["results"] = votes_count
+    state.status = "completed"
+    state.status_cache = None
     
     # Уведомляем всех подключенных
     result_message = {
@@ -237,7 +313,12 @@ async def end_voting(session_id: str):
     
     await manager.broadcast_to_type(result_message, "projector")
     await manager.broadcast_to_type(result_message, "admin")
-    
+
+    # После буферного времени токены этого раунда больше не нужны — чистим память
+    asyncio.create_task(evict_session_tokens(
+        session_id, frozenset(state.tokens), settings.TOKEN_EXPIRE_BUFFER_MINUTES * 60
+    ))
+
     logger.info(f"Завершено голосование для сессии {session_id}. Результаты: {votes_count}")
     
     return {"status": "success", "results": votes_count}
@@ -251,7 +332,7 @@ async def submit_vote(token: str = Form(...), choice: str = Form(...)):
     token_data = storage.tokens[token]
     
     # Проверяем, не использован ли токен
-    if token_data["used"]:
+    if token in storage.used_tokens:
         raise HTTPException(status_code=400, detail="Токен уже использован")
     
     # Проверяем срок действия
@@ -260,307 +341,329 @@ async def submit_vote(token: str = Form(...), choice: str = Form(...)):
     
     # Проверяем, активно ли голосование
     session_id = token_data["session_id"]
-    if session_id not in storage.active_voting or storage.active_voting[session_id]["status"] != "active":
+    state = storage.sessions.get(session_id)
+    if state is None or state.voting is None or state.voting["status"] != "active":
         raise HTTPException(status_code=400, detail="Голосование не активно")
-    
-    # Проверяем выбор
-    if choice not in ["за", "против", "воздержался"]:
+
+    # Проверяем выбор и сразу получаем компактный индекс
+    choice_idx = _CHOICE_MAP.get(choice)
+    if choice_idx is None:
         raise HTTPException(status_code=400, detail="Недопустимый выбор")
-    
+
     # Записываем голос (анонимно)
-    vote_record = {
-        "session_id": session_id,
-        "choice": choice,
-        "timestamp": time.time(),
-        "token_hash": hash_token(token)  # Храним только хеш для предотвращения дублирования
-    }
-    
-    if session_id not in storage.votes:
-        storage.votes[session_id] = []
-    
-    storage.votes[session_id].append(vote_record)
-    
+    state.vote_choices.append(choice_idx)
+    state.vote_timestamps.append(time.time())
+    state.vote_token_hashes.append(hash_token(token))  # Храним только хеш для предотвращения дублирования
+
     # Отмечаем токен как использованный
-    storage.tokens[token]["used"] = True
-    storage.tokens[token]["voted_at"] = time.time()
-    
-    # Подсчитываем текущие голоса для обновления
-    current_votes = {"за": 0, "против": 0, "воздержался": 0}
-    for vote in storage.votes[session_id]:
-        current_votes[vote["choice"]] += 1
-    
+    storage.used_tokens.add(token)
+    state.unused_tokens -= 1
+
+    # Инкрементально обновляем счетчики вместо пересчета всех голосов
+    state.vote_counts[choice_idx] += 1
+    state.status_cache = None
+
     # Уведомляем админа о новом голосе
     await manager.broadcast_to_type({
         "type": "vote_received",
         "session_id": session_id,
-        "current_votes": current_votes,
-        "total_members": len(storage.members.get(session_id, []))
+        "current_votes": _counts_to_dict(state.vote_counts),
+        "total_members": state.member_count
     }, "admin")
     
     logger.info(f"Получен голос '{choice}' для сессии {session_id}")
     
     return {"status": "success", "message": "Голос принят"}
 
+# HTML страницы голосования: статические тексты и шаблон собираются один раз
+# при импорте, на запросе остается только дешевая подстановка значений
+_VOTE_USED_HTML = """
+<!DOCTYPE html>
+<html lang="ru">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Голосование</title>
+    <style>
+        body { font-family: Arial, sans-serif; text-align: center; padding: 20px; background: #f0f2f5; }
+        .container { max-width: 400px; margin: 0 auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+        .message { color: #666; font-size: 18px; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h2>Голосование завершено</h2>
+        <p class="message">Вы уже проголосовали или голосование закончено.</p>
+    </div>
+</body>
+</html>
+"""
+
+_VOTE_INACTIVE_HTML = """
+<!DOCTYPE html>
+<html lang="ru">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Голосование</title>
+    <style>
+        body { font-family: Arial, sans-serif; text-align: center; padding: 20px; background: #f0f2f5; }
+        .container { max-width: 400px; margin: 0 auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+        .message { color: #666; font-size: 18px; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h2>Голосование не активно</h2>
+        <p class="message">Голосование еще не началось или уже завершено.</p>
+    </div>
+</body>
+</html>
+"""
+
+# Статические страницы отдаем как готовые Response-объекты: ни строка,
+# ни заголовки не пересоздаются на каждый запрос
+_VOTE_USED_RESPONSE = HTMLResponse(_VOTE_USED_HTML)
+_VOTE_INACTIVE_RESPONSE = HTMLResponse(_VOTE_INACTIVE_HTML)
+
+_VOTE_ACTIVE_TPL = string.Template("""
+<!DOCTYPE html>
+<html lang="ru">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Голосование - $topic_title</title>
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            margin: 0;
+            padding: 20px;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            min-height: 100vh;
+        }
+        .container {
+            max-width: 400px;
+            margin: 0 auto;
+            background: white;
+            padding: 30px;
+            border-radius: 15px;
+            box-shadow: 0 10px 30px rgba(0,0,0,0.2);
+        }
+        .header { margin-bottom: 30px; text-align: center; }
+        .topic-title { color: #333; margin-bottom: 10px; font-size: 20px; font-weight: bold; }
+        .presenter { color: #666; margin-bottom: 15px; }
+        .description { color: #555; font-size: 14px; line-height: 1.4; margin-bottom: 20px; }
+        .timer {
+            background: #ff4757;
+            color: white;
+            padding: 10px;
+            border-radius: 8px;
+            font-size: 18px;
+            font-weight: bold;
+            margin-bottom: 30px;
+        }
+        .vote-buttons { display: flex; flex-direction: column; gap: 15px; }
+        .vote-btn {
+            padding: 15px;
+            border: none;
+            border-radius: 10px;
+            font-size: 18px;
+            font-weight: bold;
+            cursor: pointer;
+            transition: all 0.3s ease;
+            text-transform: uppercase;
+        }
+        .vote-for { background: #2ed573; color: white; }
+        .vote-for:hover { background: #26b96d; transform: translateY(-2px); }
+        .vote-against { background: #ff4757; color: white; }
+        .vote-against:hover { background: #e73c3c; transform: translateY(-2px); }
+        .vote-abstain { background: #ffa502; color: white; }
+        .vote-abstain:hover { background: #e89002; transform: translateY(-2px); }
+        .confirmation {
+            display: none;
+            text-align: center;
+            padding: 20px;
+            background: #f1f2f6;
+            border-radius: 10px;
+            margin-top: 20px;
+        }
+        .confirm-btn { background: #5352ed; color: white; margin-right: 10px; }
+        .cancel-btn { background: #6c757d; color: white; }
+        .confirm-btn:hover { background: #3b3ad9; }
+        .cancel-btn:hover { background: #545b62; }
+        .success {
+            display: none;
+            text-align: center;
+            color: #2ed573;
+            font-size: 20px;
+            font-weight: bold;
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h2 class="topic-title">$topic_title</h2>
+            <div class="presenter">Докладчик: $presenter_name</div>
+            <div class="description">$topic_description</div>
+            <div class="timer" id="timer">Загрузка...</div>
+        </div>
+
+        <div id="voting-form">
+            <div class="vote-buttons">
+                <button class="vote-btn vote-for" onclick="selectVote('за')">За</button>
+                <button class="vote-btn vote-against" onclick="selectVote('против')">Против</button>
+                <button class="vote-btn vote-abstain" onclick="selectVote('воздержался')">Воздержался</button>
+            </div>
+
+            <div class="confirmation" id="confirmation">
+                <p>Вы выбрали: <strong id="selected-choice"></strong></p>
+                <p>Подтвердить свой голос?</p>
+                <button class="vote-btn confirm-btn" onclick="confirmVote()">Подтвердить</button>
+                <button class="vote-btn cancel-btn" onclick="cancelVote()">Отменить</button>
+            </div>
+        </div>
+
+        <div class="success" id="success">
+            <p>✅ Ваш голос принят!</p>
+            <p>Спасибо за участие в голосовании.</p>
+        </div>
+    </div>
+
+    <script>
+        let selectedChoice = '';
+        const endTime = $end_time * 1000;
+
+        function updateTimer() {
+            const now = Date.now();
+            const remaining = Math.max(0, endTime - now);
+            const minutes = Math.floor(remaining / 60000);
+            const seconds = Math.floor((remaining % 60000) / 1000);
+
+            if (remaining > 0) {
+                document.getElementById('timer').textContent =
+                    `Осталось времени: $${minutes}:$${seconds.toString().padStart(2, '0')}`;
+            } else {
+                document.getElementById('timer').textContent = 'Время голосования истекло';
+                document.getElementById('timer').style.background = '#6c757d';
+            }
+        }
+
+        setInterval(updateTimer, 1000);
+        updateTimer();
+
+        function selectVote(choice) {
+            selectedChoice = choice;
+            document.getElementById('selected-choice').textContent = choice;
+            document.getElementById('confirmation').style.display = 'block';
+        }
+
+        function cancelVote() {
+            selectedChoice = '';
+            document.getElementById('confirmation').style.display = 'none';
+        }
+
+        async function confirmVote() {
+            const formData = new FormData();
+            formData.append('token', '$token');
+            formData.append('choice', selectedChoice);
+
+            try {
+                const response = await fetch('/api/vote', {
+                    method: 'POST',
+                    body: formData
+                });
+
+                if (response.ok) {
+                    document.getElementById('voting-form').style.display = 'none';
+                    document.getElementById('success').style.display = 'block';
+                } else {
+                    const error = await response.json();
+                    alert('Ошибка: ' + error.detail);
+                }
+            } catch (error) {
+                alert('Ошибка соединения: ' + error.message);
+            }
+        }
+    </script>
+</body>
+</html>
+""")
+
 @app.get("/api/vote-page")
 async def get_vote_page(token: str):
     if token not in storage.tokens:
         raise HTTPException(status_code=404, detail="Недействительный токен")
-    
+
     token_data = storage.tokens[token]
-    
-    if token_data["used"]:
-        return HTMLResponse("""
-        <!DOCTYPE html>
-        <html lang="ru">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Голосование</title>
-            <style>
-                body { font-family: Arial, sans-serif; text-align: center; padding: 20px; background: #f0f2f5; }
-                .container { max-width: 400px; margin: 0 auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
-                .message { color: #666; font-size: 18px; }
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h2>Голосование завершено</h2>
-                <p class="message">Вы уже проголосовали или голосование закончено.</p>
-            </div>
-        </body>
-        </html>
-        """)
-    
-    session_id = token_data["session_id"]
-    voting_info = storage.active_voting.get(session_id)
-    
+
+    if token in storage.used_tokens:
+        return _VOTE_USED_RESPONSE
+
+    state = storage.sessions.get(token_data["session_id"])
+    voting_info = state.voting if state is not None else None
+
     if not voting_info or voting_info["status"] != "active":
-        return HTMLResponse("""
-        <!DOCTYPE html>
-        <html lang="ru">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Голосование</title>
-            <style>
-                body { font-family: Arial, sans-serif; text-align: center; padding: 20px; background: #f0f2f5; }
-                .container { max-width: 400px; margin: 0 auto; background: white; padding: 30px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
-                .message { color: #666; font-size: 18px; }
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h2>Голосование не активно</h2>
-                <p class="message">Голосование еще не началось или уже завершено.</p>
-            </div>
-        </body>
-        </html>
-        """)
-    
-    return HTMLResponse(f"""
-    <!DOCTYPE html>
-    <html lang="ru">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Голосование - {voting_info['topic_title']}</title>
-        <style>
-            body {{ 
-                font-family: Arial, sans-serif; 
-                margin: 0; 
-                padding: 20px; 
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-            }}
-            .container {{ 
-                max-width: 400px; 
-                margin: 0 auto; 
-                background: white; 
-                padding: 30px; 
-                border-radius: 15px; 
-                box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-            }}
-            .header {{ margin-bottom: 30px; text-align: center; }}
-            .topic-title {{ color: #333; margin-bottom: 10px; font-size: 20px; font-weight: bold; }}
-            .presenter {{ color: #666; margin-bottom: 15px; }}
-            .description {{ color: #555; font-size: 14px; line-height: 1.4; margin-bottom: 20px; }}
-            .timer {{ 
-                background: #ff4757; 
-                color: white; 
-                padding: 10px; 
-                border-radius: 8px; 
-                font-size: 18px; 
-                font-weight: bold; 
-                margin-bottom: 30px;
-            }}
-            .vote-buttons {{ display: flex; flex-direction: column; gap: 15px; }}
-            .vote-btn {{ 
-                padding: 15px; 
-                border: none; 
-                border-radius: 10px; 
-                font-size: 18px; 
-                font-weight: bold; 
-                cursor: pointer; 
-                transition: all 0.3s ease;
-                text-transform: uppercase;
-            }}
-            .vote-for {{ background: #2ed573; color: white; }}
-            .vote-for:hover {{ background: #26b96d; transform: translateY(-2px); }}
-            .vote-against {{ background: #ff4757; color: white; }}
-            .vote-against:hover {{ background: #e73c3c; transform: translateY(-2px); }}
-            .vote-abstain {{ background: #ffa502; color: white; }}
-            .vote-abstain:hover {{ background: #e89002; transform: translateY(-2px); }}
-            .confirmation {{ 
-                display: none; 
-                text-align: center; 
-                padding: 20px; 
-                background: #f1f2f6; 
-                border-radius: 10px; 
-                margin-top: 20px; 
-            }}
-            .confirm-btn {{ background: #5352ed; color: white; margin-right: 10px; }}
-            .cancel-btn {{ background: #6c757d; color: white; }}
-            .confirm-btn:hover {{ background: #3b3ad9; }}
-            .cancel-btn:hover {{ background: #545b62; }}
-            .success {{ 
-                display: none; 
-                text-align: center; 
-                color: #2ed573; 
-                font-size: 20px; 
-                font-weight: bold; 
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h2 class="topic-title">{voting_info['topic_title']}</h2>
-                <div class="presenter">Докладчик: {voting_info['presenter_name']}</div>
-                <div class="description">{voting_info['topic_description']}</div>
-                <div class="timer" id="timer">Загрузка...</div>
-            </div>
-            
-            <div id="voting-form">
-                <div class="vote-buttons">
-                    <button class="vote-btn vote-for" onclick="selectVote('за')">За</button>
-                    <button class="vote-btn vote-against" onclick="selectVote('против')">Против</button>
-                    <button class="vote-btn vote-abstain" onclick="selectVote('воздержался')">Воздержался</button>
-                </div>
-                
-                <div class="confirmation" id="confirmation">
-                    <p>Вы выбрали: <strong id="selected-choice"></strong></p>
-                    <p>Подтвердить свой голос?</p>
-                    <button class="vote-btn confirm-btn" onclick="confirmVote()">Подтвердить</button>
-                    <button class="vote-btn cancel-btn" onclick="cancelVote()">Отменить</button>
-                </div>
-            </div>
-            
-            <div class="success" id="success">
-                <p>✅ Ваш голос принят!</p>
-                <p>Спасибо за участие в голосовании.</p>
-            </div>
-        </div>
+        return _VOTE_INACTIVE_RESPONSE
 
-        <script>
-            let selectedChoice = '';
-            const endTime = {voting_info['end_time']} * 1000;
-            
-            function updateTimer() {{
-                const now = Date.now();
-                const remaining = Math.max(0, endTime - now);
-                const minutes = Math.floor(remaining / 60000);
-                const seconds = Math.floor((remaining % 60000) / 1000);
-                
-                if (remaining > 0) {{
-                    document.getElementById('timer').textContent = 
-                        `Осталось времени: ${{minutes}}:${{seconds.toString().padStart(2, '0')}}`;
-                }} else {{
-                    document.getElementById('timer').textContent = 'Время голосования истекло';
-                    document.getElementById('timer').style.background = '#6c757d';
-                }}
-            }}
-            
-            setInterval(updateTimer, 1000);
-            updateTimer();
-            
-            function selectVote(choice) {{
-                selectedChoice = choice;
-                document.getElementById('selected-choice').textContent = choice;
-                document.getElementById('confirmation').style.display = 'block';
-            }}
-            
-            function cancelVote() {{
-                selectedChoice = '';
-                document.getElementById('confirmation').style.display = 'none';
-            }}
-            
-            async function confirmVote() {{
-                const formData = new FormData();
-                formData.append('token', '{token}');
-                formData.append('choice', selectedChoice);
-                
-                try {{
-                    const response = await fetch('/api/vote', {{
-                        method: 'POST',
-                        body: formData
-                    }});
-                    
-                    if (response.ok) {{
-                        document.getElementById('voting-form').style.display = 'none';
-                        document.getElementById('success').style.display = 'block';
-                    }} else {{
-                        const error = await response.json();
-                        alert('Ошибка: ' + error.detail);
-                    }}
-                }} catch (error) {{
-                    alert('Ошибка соединения: ' + error.message);
-                }}
-            }}
-        </script>
-    </body>
-    </html>
-    """)
+    return HTMLResponse(_VOTE_ACTIVE_TPL.substitute(
+        topic_title=voting_info["topic_title"],
+        presenter_name=voting_info["presenter_name"],
+        topic_description=voting_info["topic_description"],
+        end_time=voting_info["end_time"],
+        token=token,
+    ))
 
 @app.get("/api/sessions/{session_id}/status")
 async def get_session_status(session_id: str):
-    if session_id not in storage.sessions:
+    state = storage.sessions.get(session_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Сессия не найдена")
-    
-    session_data = storage.sessions[session_id]
-    voting_data = storage.active_voting.get(session_id, {})
-    
-    # Подсчитываем текущие голоса
-    current_votes = {"за": 0, "против": 0, "воздержался": 0}
-    for vote in storage.votes.get(session_id, []):
-        current_votes[vote["choice"]] += 1
-    
-    return {
-        "session": session_data,
-        "voting": voting_data,
-        "current_votes": current_votes,
-        "total_members": len(storage.members.get(session_id, []))
+
+    # Дашборды опрашивают статус раз в секунду — короткий кеш снимает пересборку
+    now = time.time()
+    if state.status_cache is not None and now - state.status_cache[0] < _STATUS_CACHE_TTL:
+        return state.status_cache[1]
+
+    response = {
+        "session": {
+            "id": state.id,
+            "title": state.title,
+            "description": state.description,
+            "created_at": _iso(state.created_at),
+            "status": state.status
+        },
+        "voting": state.voting or {},
+        # Текущие голоса берем из накопленных счетчиков
+        "current_votes": _counts_to_dict(state.vote_counts),
+        "total_members": state.member_count
     }
+    state.status_cache = (now, response)
+    return response
 
 # WebSocket endpoints
-@app.websocket("/ws/admin")
-async def websocket_admin(websocket: WebSocket):
-    await manager.connect(websocket, "admin")
+async def _hold_connection(websocket: WebSocket, connection_type: str):
+    """Держит соединение открытым до отключения клиента.
+
+    Входящие сообщения (heartbeat) никак не обрабатываются, поэтому читаем
+    сырые события через receive() и не платим за utf-8 декодирование строк.
+    """
+    await manager.connect(websocket, connection_type)
     try:
         while True:
-            data = await websocket.receive_text()
-            # Обработка сообщений от админа при необходимости
-    except WebSocketDisconnect:
-        manager.disconnect(websocket, "admin")
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    finally:
+        manager.disconnect(websocket, connection_type)
+
+@app.websocket("/ws/admin")
+async def websocket_admin(websocket: WebSocket):
+    await _hold_connection(websocket, "admin")
 
 @app.websocket("/ws/projector")
 async def websocket_projector(websocket: WebSocket):
-    await manager.connect(websocket, "projector")
-    try:
-        while True:
-            data = await websocket.receive_text()
-            # Обработка сообщений от проектора при необходимости
-    except WebSocketDisconnect:
-        manager.disconnect(websocket, "projector")
+    await _hold_connection(websocket, "projector")
 
 # Статические файлы и страницы
 @app.get("/vote")
@@ -581,4 +684,5 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop и httptools заметно снижают накладные расходы цикла событий
+    uvicorn.run(app, host=settings.HOST, port=settings.PORT, loop="uvloop", http="httptools")